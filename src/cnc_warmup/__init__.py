@@ -13,15 +13,25 @@ __email__ = "kp61dude@gmail.com"
 
 
 # make imports a little cleaner for pubic API
+from .archive import ProgramArchive
 from .cli import main
 from .models import MachineProfile, Tool, WarmupConfig
-from .warmup_generator import WarmupGenerator
+from .patterns import Arc, Circle, Line, Pattern, register_pattern
+from .warmup_generator import GenerationPlan, WarmupGenerator, get_plan
 
 # when you import with *
 __all__ = [
     'main',
+    'ProgramArchive',
     'MachineProfile',
     'Tool',
     'WarmupConfig',
-    'WarmupGenerator'
+    'WarmupGenerator',
+    'GenerationPlan',
+    'get_plan',
+    'Arc',
+    'Circle',
+    'Line',
+    'Pattern',
+    'register_pattern'
 ]
@@ -0,0 +1,282 @@
+import hashlib
+import os
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+
+from .models import WarmupConfig
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+INDEX_MAGIC = b"CNCWARC2"
+INDEX_HEADER_SIZE = 16  # magic + padding
+INDEX_NAME = "index.idx"
+LOCK_NAME = "archive.lock"
+SEGMENT_SIZE = 64 * 1024 * 1024  # start a new segment file after 64MB
+PACKED = 1 << 31  # segment number flag for compacted packs (NNNNN.pack files)
+
+# One fixed width record per archived program
+INDEX_DTYPE = np.dtype([
+    ("config_hash", "S16"),
+    ("machine", "S16"),
+    ("timestamp", "<f8"),  # seconds since epoch
+    ("segment", "<u4"),    # PACKED set when the program lives in a pack
+    ("crc32", "<u4"),
+    ("offset", "<u8"),
+    ("length", "<u4"),     # compressed size
+    ("raw_length", "<u4"),
+    ("sha1", "S20"),       # digest of the raw program, identifies duplicates
+])
+
+
+def config_hash(config: WarmupConfig) -> str:
+    """Stable 16 character hash of every warmup setting"""
+    items = sorted(asdict(config).items())
+    return hashlib.sha1(repr(items).encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class ArchiveEntry:
+    """Where one archived program lives"""
+    config_hash: str
+    machine: str
+    timestamp: float
+    segment: int
+    offset: int
+    length: int
+    raw_length: int
+    crc32: int
+    sha1: str
+
+
+class ProgramArchive:
+    """Append-only store of generated programs.
+
+    Programs are zlib compressed one by one and appended to numbered segment
+    files, a fixed width index (read through a memory map) points at them.
+    Writers (append, compact) take an exclusive lock, so several processes
+    can write into the same archive.
+    """
+
+    def __init__(self, path: Union[str, Path], segment_size: int = SEGMENT_SIZE):
+        self.path = Path(path)
+        self.segment_size = segment_size
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.path / INDEX_NAME
+        self.lock_path = self.path / LOCK_NAME
+        with self._locked():
+            if not self.index_path.exists():
+                self._write_index_header(self.index_path)
+        with open(self.index_path, "rb") as f:
+            if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                raise ValueError(f"{self.index_path} is not a warmup archive index")
+
+    @contextmanager
+    def _locked(self):
+        """Hold the archive's exclusive write lock"""
+        with open(self.lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+                return
+            # msvcrt locks bytes from the current position and gives up after
+            # about 10 seconds, lock the first byte and keep waiting
+            lock.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+            try:
+                yield
+            finally:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+    @staticmethod
+    def _write_index_header(path: Path) -> None:
+        with open(path, "wb") as f:
+            f.write(INDEX_MAGIC.ljust(INDEX_HEADER_SIZE, b"\0"))
+
+    def _segment_path(self, segment: int) -> Path:
+        if segment & PACKED:
+            return self.path / f"{segment & ~PACKED:05d}.pack"
+        return self.path / f"{segment:05d}.seg"
+
+    def _tmp_path(self, segment: int) -> Path:
+        path = self._segment_path(segment)
+        return path.with_name(path.name + ".tmp")
+
+    def _segments(self) -> List[int]:
+        return sorted(int(p.stem) for p in self.path.glob("*.seg"))
+
+    def _records(self) -> np.ndarray:
+        """Memory mapped view of the index (empty array when nothing archived)"""
+        count = (self.index_path.stat().st_size - INDEX_HEADER_SIZE) // INDEX_DTYPE.itemsize
+        if count <= 0:
+            return np.zeros(0, dtype=INDEX_DTYPE)
+        return np.memmap(self.index_path, dtype=INDEX_DTYPE, mode="r",
+                         offset=INDEX_HEADER_SIZE, shape=(count,))
+
+    @staticmethod
+    def _entry(record) -> ArchiveEntry:
+        return ArchiveEntry(
+            config_hash=record["config_hash"].decode("ascii"),
+            machine=record["machine"].decode("ascii"),
+            timestamp=float(record["timestamp"]),
+            segment=int(record["segment"]),
+            offset=int(record["offset"]),
+            length=int(record["length"]),
+            raw_length=int(record["raw_length"]),
+            crc32=int(record["crc32"]),
+            # numpy strips trailing zero bytes from fixed width strings
+            sha1=bytes(record["sha1"]).ljust(20, b"\0").hex()
+        )
+
+    def __len__(self) -> int:
+        return len(self._records())
+
+    def append(self, config: WarmupConfig, gcode: List[str],
+               timestamp: Optional[float] = None) -> ArchiveEntry:
+        """Compress and store one program, returns its index entry"""
+        raw = "\n".join(gcode).encode("utf-8")
+        blob = zlib.compress(raw, 9)
+
+        record = np.zeros(1, dtype=INDEX_DTYPE)
+        record["config_hash"] = config_hash(config)
+        record["machine"] = config.machine_type
+        record["timestamp"] = time.time() if timestamp is None else timestamp
+        record["crc32"] = zlib.crc32(raw)
+        record["length"] = len(blob)
+        record["raw_length"] = len(raw)
+        record["sha1"] = hashlib.sha1(raw).digest()
+
+        with self._locked():
+            segments = self._segments()
+            segment = segments[-1] if segments else 0
+            segment_path = self._segment_path(segment)
+            if segment_path.exists() and segment_path.stat().st_size + len(blob) > self.segment_size:
+                segment += 1
+                segment_path = self._segment_path(segment)
+
+            with open(segment_path, "ab") as f:
+                offset = os.fstat(f.fileno()).st_size
+                f.write(blob)
+            record["segment"] = segment
+            record["offset"] = offset
+
+            # Segment data is written first so the index never points at nothing
+            with open(self.index_path, "r+b") as f:
+                size = os.fstat(f.fileno()).st_size
+                count = (size - INDEX_HEADER_SIZE) // INDEX_DTYPE.itemsize
+                # Drop the tail of a record an interrupted append left behind
+                f.truncate(INDEX_HEADER_SIZE + count * INDEX_DTYPE.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(record.tobytes())
+        return self._entry(record[0])
+
+    def find(self, config_hash: Optional[str] = None, machine: Optional[str] = None,
+             since: Optional[float] = None, until: Optional[float] = None) -> List[ArchiveEntry]:
+        """Entries matching every given filter, oldest first"""
+        records = self._records()
+        mask = np.ones(len(records), dtype=bool)
+        if config_hash is not None:
+            mask &= records["config_hash"] == config_hash.encode("ascii")
+        if machine is not None:
+            mask &= records["machine"] == machine.encode("ascii")
+        if since is not None:
+            mask &= records["timestamp"] >= since
+        if until is not None:
+            mask &= records["timestamp"] <= until
+        matches = records[mask]
+        order = np.argsort(matches["timestamp"], kind="stable")
+        return [self._entry(record) for record in matches[order]]
+
+    def latest(self, config: WarmupConfig) -> Optional[ArchiveEntry]:
+        """Most recent program archived for this exact configuration"""
+        entries = self.find(config_hash=config_hash(config))
+        return entries[-1] if entries else None
+
+    def read(self, entry: ArchiveEntry) -> str:
+        """Read back the text of a single program without touching any other"""
+        with open(self._segment_path(entry.segment), "rb") as f:
+            f.seek(entry.offset)
+            raw = zlib.decompress(f.read(entry.length))
+        if len(raw) != entry.raw_length or zlib.crc32(raw) != entry.crc32:
+            raise ValueError(f"Archived program at segment {entry.segment} "
+                             f"offset {entry.offset} is corrupt")
+        return raw.decode("utf-8")
+
+    def compact(self) -> int:
+        """Move sealed segments into packs, dropping duplicate programs.
+
+        Only segments that were never compacted are read, the newest segment
+        (still taking appends) is not touched. Packs are split at
+        segment_size and numbered after segments they replace, so they stay
+        below the active segment and are never rewritten. Identical programs
+        (same sha1 of the text) share a single stored copy, also across
+        packs, every index entry is kept. Returns the number of files removed.
+        """
+        with self._locked():
+            return self._compact()
+
+    def _compact(self) -> int:
+        sealed = self._segments()[:-1]
+        if not sealed:
+            return 0
+
+        records = np.array(self._records())
+        # sha1 of the raw program -> (segment, offset) of its stored copy
+        stored = {bytes(record["sha1"]): (int(record["segment"]), int(record["offset"]))
+                  for record in records[(records["segment"] & PACKED) != 0]}
+        packs = []
+        out = None
+        try:
+            for i in np.flatnonzero(np.isin(records["segment"], sealed)):
+                record = records[i]
+                key = bytes(record["sha1"])
+                if key not in stored:
+                    source = int(record["segment"])
+                    length = int(record["length"])
+                    # A pack is named after the segment of its first program, a
+                    # segment larger than segment_size can overfill its pack
+                    if out is None or (out.tell() + length > self.segment_size
+                                       and packs[-1] != source | PACKED):
+                        if out is not None:
+                            out.close()
+                        packs.append(source | PACKED)
+                        out = open(self._tmp_path(packs[-1]), "wb")
+                    with open(self._segment_path(source), "rb") as f:
+                        f.seek(int(record["offset"]))
+                        stored[key] = (packs[-1], out.tell())
+                        out.write(f.read(length))
+                records["segment"][i], records["offset"][i] = stored[key]
+        finally:
+            if out is not None:
+                out.close()
+
+        tmp_index = self.path / f"{INDEX_NAME}.tmp"
+        self._write_index_header(tmp_index)
+        with open(tmp_index, "ab") as f:
+            f.write(records.tobytes())
+
+        # Sealed segments stay valid until the new index is in place
+        for pack in packs:
+            os.replace(self._tmp_path(pack), self._segment_path(pack))
+        os.replace(tmp_index, self.index_path)
+        for segment in sealed:
+            self._segment_path(segment).unlink()
+        return len(sealed) - len(packs)
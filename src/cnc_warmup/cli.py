@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 import argparse
+import csv
 import sys
 from .models import WarmupConfig, Tool
 from .warmup_generator import WarmupGenerator
+from .archive import ProgramArchive
+from . import sweep
 import click
 
 
@@ -83,11 +86,27 @@ def parse_arguments():
         help="Enable flood coolant (if machine supports it!)"
     )
 
+    parser.add_argument(
+        "-p", "--pattern",
+        choices=["off", "replace", "alongside"],
+        default="off",
+        help="""Machine movement pattern (default: off):
+        off       - diagonal FOR loop cycle only
+        replace   - machine pattern instead of the diagonal cycle
+        alongside - diagonal cycle followed by the machine pattern"""
+    )
+
     parser.add_argument(
         "-o", "--output",
         help="Output file path (default: prints to console)"
     )
 
+    parser.add_argument(
+        "-a", "--archive",
+        metavar="DIR",
+        help="Also store the program in a compressed archive directory"
+    )
+
     return parser.parse_args()
 
 
@@ -102,12 +121,18 @@ def main():
                 radius=args.tool_radius
             ),
             duration_min=args.duration,
-            use_coolant=args.coolant
+            use_coolant=args.coolant,
+            pattern_mode=args.pattern
         )
 
         generator = WarmupGenerator(config)
         gcode = generator.generate_gcode()
 
+        if args.archive:
+            entry = ProgramArchive(args.archive).append(config, gcode)
+            print(f"Warmup program archived as {entry.config_hash} in {args.archive}",
+                  file=sys.stderr)
+
         if args.output:
             with open(args.output, 'w', encoding='utf-8') as f:
                 f.write("\n".join(gcode))
@@ -120,5 +145,110 @@ def main():
         sys.exit(1)
 
 
+def parse_sweep_arguments():
+    parser = argparse.ArgumentParser(
+        description =
+        """Compare warmup parameter combinations without generating programs
+
+            Prints the Pareto-optimal schedules (shortest runtime, lowest peak
+            feed, most axis travel and spindle revolutions).
+
+            Example:
+              cnc-warmup-sweep all --tool-length 150 --duration 20 30 45""",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+
+    parser.add_argument(
+        "machine_type",
+        choices=["small", "medium", "large", "all"],
+        help="Machine size selection, or all bundled machines"
+    )
+
+    parser.add_argument(
+        "-tl", "--tool-length",
+        type=validate_positive_float,
+        required=True,
+        help="Tool length from gauge line in mm (ex. 120.5)"
+    )
+
+    parser.add_argument(
+        "-tr", "--tool-radius",
+        type=validate_positive_float,
+        default=5.0,
+        help="Tool radius in mm (default: 5.0)"
+    )
+
+    for flag, default, help_text in [
+            ("--start-feed", sweep.DEFAULT_START_FEED, "Start feed percentages"),
+            ("--finish-feed", sweep.DEFAULT_FINISH_FEED, "Finish feed percentages"),
+            ("--start-rpm", sweep.DEFAULT_START_RPM, "Start RPM percentages"),
+            ("--finish-rpm", sweep.DEFAULT_FINISH_RPM, "Finish RPM percentages"),
+            ("--duration", sweep.DEFAULT_DURATION, "Warmup durations in minutes")
+    ]:
+        parser.add_argument(
+            flag,
+            type=int,
+            nargs="+",
+            default=list(default),
+            help=f"{help_text} (default: {default[0]}-{default[-1]})"
+        )
+
+    parser.add_argument(
+        "-o", "--output",
+        help="Write the Pareto fronts as CSV (default: prints a table)"
+    )
+
+    return parser.parse_args()
+
+
+def sweep_main():
+    try:
+        args = parse_sweep_arguments()
+        tool = Tool(number=1, length=args.tool_length, radius=args.tool_radius)
+        machine_types = sweep.MACHINE_TYPES if args.machine_type == "all" else [args.machine_type]
+
+        rows = []
+        for machine_type in machine_types:
+            result = sweep.sweep(
+                machine_type, tool,
+                start_feed_percent=args.start_feed,
+                finish_feed_percent=args.finish_feed,
+                start_rpm_percent=args.start_rpm,
+                finish_rpm_percent=args.finish_rpm,
+                duration_min=args.duration
+            )
+            rows.extend((machine_type, point) for point in result.front)
+
+        columns = sweep.PARAMETERS + sweep.METRICS
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(("machine_type",) + columns)
+                for machine_type, point in rows:
+                    # Full precision, near ties on the front must stay apart
+                    writer.writerow(
+                        [machine_type]
+                        + [int(point[c]) for c in sweep.PARAMETERS]
+                        + [repr(float(point[c])) for c in sweep.METRICS]
+                    )
+            print(f"{len(rows)} Pareto-optimal schedules saved to {args.output}")
+        else:
+            print(f"{'machine':<8}{'feed %':>10}{'rpm %':>10}{'min':>5}"
+                  f"{'runtime':>9}{'travel m':>10}{'revs':>9}{'peak F':>8}")
+            for machine_type, point in rows:
+                print(f"{machine_type:<8}"
+                      f"{point['start_feed_percent']:>5}-{point['finish_feed_percent']:<4}"
+                      f"{point['start_rpm_percent']:>5}-{point['finish_rpm_percent']:<4}"
+                      f"{point['duration_min']:>5}"
+                      f"{point['runtime_min']:>9.1f}"
+                      f"{point['travel_mm'] / 1000:>10.1f}"
+                      f"{point['spindle_revs']:>9.0f}"
+                      f"{point['peak_feed']:>8.0f}")
+
+    except Exception as e:
+        print(f"Aw snap! Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     main()
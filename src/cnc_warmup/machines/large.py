@@ -1,4 +1,5 @@
 from ..models import MachineProfile, WarmupConfig
+from ..patterns import Pattern, Line, pattern_moves, register_pattern
 from typing import List
 
 PROFILE = MachineProfile(
@@ -11,15 +12,22 @@ PROFILE = MachineProfile(
     coolant_available=True
 )
 
+# Normalized to the usable envelope, scaled and feed ramped by the generator
+PATTERN = Pattern(
+    name="large",
+    segments=(
+        Line(1, 0, 0.4, feed=0.55),
+        Line(-1, 0, 0.6, feed=0.55),
+        Line(0, 0.83, 0.3, feed=0.45),
+        Line(0, -0.83, 0.7, feed=0.45),
+        Line(1, 0.83, 0.5, feed=0.65),
+        Line(-1, -0.83, 0.8, feed=0.65)
+    )
+)
+# Bundled default, a pattern the user registered first wins
+register_pattern("large", PATTERN, replace=False)
+
 
 def custom_movements(config: WarmupConfig, safe_z: float) -> List[str]:
-    """Override default movements if needed"""
-    return [
-        "; Custom large machine pattern",
-        f"L X+600 Y+0 Z-{safe_z*0.4:.1f} F25000",
-        f"L X-600 Y+0 Z-{safe_z*0.6:.1f} F25000",
-        f"L X+0 Y+200 Z-{safe_z*0.3:.1f} F20000",
-        f"L X+0 Y-200 Z-{safe_z*0.7:.1f} F20000",
-        f"L X+600 Y+200 Z-{safe_z*0.5:.1f} F30000 M3",
-        f"L X-600 Y-200 Z-{safe_z*0.8:.1f} F30000"
-    ]
+    """One cycle of the registered pattern at finish feed, scaled for the config's tool"""
+    return pattern_moves("large", config, safe_z)
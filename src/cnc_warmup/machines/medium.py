@@ -1,4 +1,5 @@
 from ..models import MachineProfile, WarmupConfig
+from ..patterns import Pattern, Line, pattern_moves, register_pattern
 from typing import List
 
 PROFILE = MachineProfile(
@@ -11,12 +12,20 @@ PROFILE = MachineProfile(
     coolant_available=True
 )
 
+# Normalized to the usable envelope, scaled and feed ramped by the generator
+PATTERN = Pattern(
+    name="medium",
+    segments=(
+        Line(0.83, 0, 0.4, feed=0.55),
+        Line(-0.83, 0, 0.6, feed=0.55),
+        Line(0, 0.95, 0.5, feed=0.65),
+        Line(0, -0.95, 0.7, feed=0.65)
+    )
+)
+# Bundled default, a pattern the user registered first wins
+register_pattern("medium", PATTERN, replace=False)
+
 
 def custom_movements(config: WarmupConfig, safe_z: float) -> List[str]:
-    """Override default movements if needed"""
-    return [
-        f"L X+400 Y+0 Z-{safe_z*0.4:.1f} F25000",
-        f"L X-400 Y+0 Z-{safe_z*0.6:.1f} F25000",
-        f"L X+0 Y+300 Z-{safe_z*0.5:.1f} F30000",
-        f"L X+0 Y-300 Z-{safe_z*0.7:.1f} F30000"
-    ]
+    """One cycle of the registered pattern at finish feed, scaled for the config's tool"""
+    return pattern_moves("medium", config, safe_z)
@@ -1,4 +1,5 @@
 from ..models import MachineProfile, WarmupConfig
+from ..patterns import Pattern, Line, Circle, pattern_moves, register_pattern
 from typing import List
 
 PROFILE = MachineProfile(
@@ -11,13 +12,21 @@ PROFILE = MachineProfile(
     coolant_available=True
 )
 
+# Normalized to the usable envelope, scaled and feed ramped by the generator
+PATTERN = Pattern(
+    name="small",
+    segments=(
+        Line(0.83, 0, 0.4, feed=0.45),
+        Line(-0.83, 0, 0.6, feed=0.45),
+        Line(0, 0.83, 0.5, feed=0.5),
+        Line(0, -0.83, 0.7, feed=0.5),
+        Circle(0, 0, 0.62, z=0.7, feed=0.55)  # Circular interpolation
+    )
+)
+# Bundled default, a pattern the user registered first wins
+register_pattern("small", PATTERN, replace=False)
+
 
 def custom_movements(config: WarmupConfig, safe_z: float) -> List[str]:
-    """Override default movements if needed"""
-    return [
-        f"L X+300 Y+0 Z-{safe_z*0.4:.1f} F20000",
-        f"L X-300 Y+0 Z-{safe_z*0.6:.1f} F20000",
-        f"L X+0 Y+200 Z-{safe_z*0.5:.1f} F22000",
-        f"L X+0 Y-200 Z-{safe_z*0.7:.1f} F22000",
-        "CIRCLE X+0 Y+0 R150 DR- F25000"  # Circular interpolation
-    ]
+    """One cycle of the registered pattern at finish feed, scaled for the config's tool"""
+    return pattern_moves("small", config, safe_z)
@@ -50,10 +50,18 @@ class WarmupConfig:
     start_rpm_percent: int = 25  # make this an argument later
     finish_rpm_percent: int = 100  # make this an argument later
     use_coolant: bool = False
+    pattern_mode: Literal["off", "replace", "alongside"] = "off"
 
     def __post_init__(self):
         """Validate warmup configurations."""
-        if self.duration_min <= 0:
-            raise ValueError("Duration must be positive")
-        if self.duration_min > 120:
-            raise ValueError("Duration cannot exceed 120 minutes")
+        validate_warmup_settings(self.duration_min, self.pattern_mode)
+
+
+def validate_warmup_settings(duration_min: int, pattern_mode: str) -> None:
+    """Checks shared by WarmupConfig and plans rendering without one"""
+    if pattern_mode not in ("off", "replace", "alongside"):
+        raise ValueError("Pattern mode must be off, replace or alongside")
+    if duration_min <= 0:
+        raise ValueError("Duration must be positive")
+    if duration_min > 120:
+        raise ValueError("Duration cannot exceed 120 minutes")
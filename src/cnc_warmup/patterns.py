@@ -0,0 +1,321 @@
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from importlib import import_module
+from typing import Dict, Iterator, List, Tuple, Union
+
+import numpy as np
+
+from .models import MachineProfile, WarmupConfig
+
+# Segment kinds in a compiled pattern
+LINE = 0
+ARC = 1
+
+APPROX_CYCLE_TIME = 10  # seconds, same estimate the FOR loop template uses
+
+
+@dataclass(frozen=True)
+class Line:
+    """Straight move to a point in normalized machine coordinates.
+
+    x and y are fractions of the half travel between the program's X/Y
+    limits (-1 to 1, 0 = center), z is a fraction of the depth between
+    Z_MAX (0) and Z_MIN (1) and feed is a fraction of the ramped feedrate.
+    """
+    x: float
+    y: float
+    z: float
+    feed: float = 1.0
+
+
+@dataclass(frozen=True)
+class Arc:
+    """Circular move in the XY plane around (cx, cy) at depth z.
+
+    radius is a fraction of the smaller of those half travels, angles are in
+    degrees. The tool moves to the start point first, then arcs to the end.
+    """
+    cx: float
+    cy: float
+    radius: float
+    start_deg: float
+    end_deg: float
+    z: float
+    feed: float = 1.0
+    clockwise: bool = True
+
+
+def Circle(cx: float, cy: float, radius: float, z: float,
+           feed: float = 1.0, clockwise: bool = True) -> Arc:
+    """Full circle, same as an arc that ends where it started"""
+    return Arc(cx, cy, radius, 0.0, 360.0, z, feed, clockwise)
+
+
+Segment = Union[Line, Arc]
+
+
+@dataclass(frozen=True)
+class Pattern:
+    """Named sequence of segments making up one warmup cycle"""
+    name: str
+    segments: Tuple[Segment, ...]
+
+    def __post_init__(self):
+        if not self.segments:
+            raise ValueError(f"Pattern '{self.name}' has no segments")
+        for seg in self.segments:
+            if not 0 < seg.feed <= 1:
+                raise ValueError(f"Pattern '{self.name}' feed must be in (0, 1]")
+            if not 0 <= seg.z <= 1:
+                raise ValueError(f"Pattern '{self.name}' z must be between 0-1")
+            if isinstance(seg, Line):
+                coords = (seg.x, seg.y)
+            else:
+                coords = (seg.cx, seg.cy, seg.radius)
+            if any(abs(c) > 1 for c in coords):
+                raise ValueError(f"Pattern '{self.name}' leaves the -1 to 1 envelope")
+
+
+# Default diagonal cycle, the same moves as the FOR loop template
+DIAGONAL = Pattern(
+    name="diagonal",
+    segments=(
+        Line(-1, -1, 1),  # near bottom corner
+        Line(1, 1, 0),    # near top corner
+        Line(-1, -1, 1),  # back to near bottom corner
+    )
+)
+
+_REGISTRY: Dict[str, Pattern] = {}
+
+
+def register_pattern(machine_type: str, pattern: Pattern, replace: bool = True) -> Pattern:
+    """Register (or replace) the pattern used for a machine type.
+
+    With replace=False an already registered pattern is kept, the bundled
+    machine modules register that way so they never undo a user's pattern.
+    """
+    if replace or machine_type not in _REGISTRY:
+        _REGISTRY[machine_type] = pattern
+        compile_pattern.cache_clear()
+    return _REGISTRY[machine_type]
+
+
+def get_pattern(machine_type: str) -> Pattern:
+    """Look up the registered pattern, loading the machine module if needed"""
+    if machine_type not in _REGISTRY:
+        try:
+            import_module(f".machines.{machine_type}", __package__)
+        except ImportError:
+            pass
+    if machine_type not in _REGISTRY:
+        raise ValueError(f"No pattern registered for '{machine_type}' machine")
+    return _REGISTRY[machine_type]
+
+
+@dataclass(frozen=True, eq=False)
+class CompiledPattern:
+    """Pattern geometry flattened into arrays for one machine profile"""
+    name: str
+    kinds: np.ndarray     # (n,) LINE or ARC
+    points: np.ndarray    # (n, 3) normalized line end points
+    centers: np.ndarray   # (n, 2) normalized arc centers
+    radius: np.ndarray    # (n,) normalized arc radius
+    angles: np.ndarray    # (n, 2) arc start/end in radians
+    clockwise: np.ndarray  # (n,) arc direction
+    feed: np.ndarray      # (n,) fraction of ramped feed
+    axis_cap: np.ndarray  # (n,) mm/min, slowest axis the segment moves
+
+
+def _compile(name: str, segments: Tuple[Segment, ...],
+             profile: MachineProfile) -> CompiledPattern:
+    n = len(segments)
+    kinds = np.array([LINE if isinstance(s, Line) else ARC for s in segments])
+    points = np.zeros((n, 3))
+    centers = np.zeros((n, 2))
+    radius = np.zeros(n)
+    angles = np.zeros((n, 2))
+    clockwise = np.zeros(n, dtype=bool)
+    feed = np.array([s.feed for s in segments], dtype=float)
+
+    for i, seg in enumerate(segments):
+        if isinstance(seg, Line):
+            points[i] = (seg.x, seg.y, seg.z)
+        else:
+            centers[i] = (seg.cx, seg.cy)
+            radius[i] = seg.radius
+            angles[i] = (math.radians(seg.start_deg), math.radians(seg.end_deg))
+            clockwise[i] = seg.clockwise
+            points[i] = (seg.cx, seg.cy, seg.z)
+
+    # Axes each segment moves coming from the previous one (cycles wrap around)
+    moving = points != np.roll(points, 1, axis=0)
+    moving[kinds == ARC, :2] = True
+    max_feed = np.array(profile.feedrate_mm_min, dtype=float)
+    axis_cap = np.where(moving, max_feed, np.inf).min(axis=1)
+    axis_cap[np.isinf(axis_cap)] = max_feed.min()
+
+    return CompiledPattern(
+        name=name, kinds=kinds, points=points, centers=centers, radius=radius,
+        angles=angles, clockwise=clockwise, feed=feed, axis_cap=axis_cap
+    )
+
+
+@lru_cache(maxsize=None)
+def compile_pattern(machine_type: str, alongside: bool = False) -> CompiledPattern:
+    """Compile the machine's registered pattern once per profile.
+
+    With alongside=True the default diagonal cycle runs before the pattern.
+    """
+    from .warmup_generator import load_machine_profile
+
+    pattern = get_pattern(machine_type)
+    if alongside:
+        return _compile(f"{DIAGONAL.name}+{pattern.name}",
+                        DIAGONAL.segments + pattern.segments,
+                        load_machine_profile(machine_type))
+    return _compile(pattern.name, pattern.segments, load_machine_profile(machine_type))
+
+
+def _fmt(value: float) -> str:
+    return f"{round(value, 1) + 0.0:+.1f}"  # + 0.0 drops the sign of -0.0
+
+
+def _scale(compiled: CompiledPattern,
+           lower: Tuple[float, float, float],
+           upper: Tuple[float, float, float]) -> Tuple[List[Tuple[str, ...]], np.ndarray, float]:
+    """Scale and clamp the geometry to an envelope in one go.
+
+    Returns the program lines of every segment (lines ending in " F" still
+    need their feed), each segment's move length and the extra length of
+    the first cycle, which starts at X0 Y0 Z0.
+    """
+    lower = np.asarray(lower, dtype=float)
+    upper = np.asarray(upper, dtype=float)
+    mid = (upper + lower) / 2
+    half = (upper - lower) / 2
+
+    # Scale x/y around the envelope center, z measured down from the top
+    ends = np.empty_like(compiled.points)
+    ends[:, :2] = mid[:2] + compiled.points[:, :2] * half[:2]
+    ends[:, 2] = upper[2] - compiled.points[:, 2] * (upper[2] - lower[2])
+    ends = np.clip(ends, lower, upper)
+
+    # Keep whole arcs inside the envelope by pulling the center in
+    radius = np.minimum(compiled.radius * half[:2].min(), half[:2].min())
+    centers = mid[:2] + compiled.centers * half[:2]
+    centers = np.clip(centers, lower[:2] + radius[:, None], upper[:2] - radius[:, None])
+    arc_start = centers + radius[:, None] * np.stack(
+        [np.cos(compiled.angles[:, 0]), np.sin(compiled.angles[:, 0])], axis=1)
+    arc_end = centers + radius[:, None] * np.stack(
+        [np.cos(compiled.angles[:, 1]), np.sin(compiled.angles[:, 1])], axis=1)
+
+    # Where each segment leaves the tool, arcs end on their end point
+    positions = ends.copy()
+    arc = compiled.kinds == ARC
+    positions[arc, :2] = arc_end[arc]
+    starts = ends.copy()
+    starts[arc, :2] = arc_start[arc]
+    # Move length of every segment coming from the previous one (cycles wrap around)
+    lengths = np.linalg.norm(starts - np.roll(positions, 1, axis=0), axis=1)
+    sweep = np.where(compiled.clockwise, compiled.angles[:, 0] - compiled.angles[:, 1],
+                     compiled.angles[:, 1] - compiled.angles[:, 0]) % (2 * math.pi)
+    sweep[sweep == 0] = 2 * math.pi  # start == end is a full circle
+    lengths[arc] += radius[arc] * sweep[arc]
+    approach = np.linalg.norm(starts[0]) - np.linalg.norm(starts[0] - positions[-1])
+
+    # Geometry is the same every cycle, only F changes
+    templates = []
+    for i, kind in enumerate(compiled.kinds):
+        z = _fmt(ends[i, 2])
+        if kind == LINE:
+            templates.append((f"  L X{_fmt(ends[i, 0])} Y{_fmt(ends[i, 1])} Z{z} F",))
+        else:
+            direction = "-" if compiled.clockwise[i] else "+"
+            templates.append((
+                f"  L X{_fmt(arc_start[i, 0])} Y{_fmt(arc_start[i, 1])} Z{z} F",
+                f"  CC X{_fmt(centers[i, 0])} Y{_fmt(centers[i, 1])}",
+                f"  C X{_fmt(arc_end[i, 0])} Y{_fmt(arc_end[i, 1])} DR{direction} F",
+            ))
+    return templates, lengths, float(approach)
+
+
+def _fill(templates: List[Tuple[str, ...]], feeds: np.ndarray) -> Iterator[str]:
+    for template, feed in zip(templates, feeds):
+        for line in template:
+            yield f"{line}{feed}" if line.endswith(" F") else line
+
+
+def stream_cycles(compiled: CompiledPattern,
+                  lower: Tuple[float, float, float],
+                  upper: Tuple[float, float, float],
+                  feed_adjust: float,
+                  max_rpm: int,
+                  duration_min: int,
+                  start_feed_percent: int,
+                  finish_feed_percent: int,
+                  start_rpm_percent: int,
+                  finish_rpm_percent: int) -> Iterator[str]:
+    """Yield program lines for every warmup cycle of a compiled pattern.
+
+    Feeds and RPM ramp from the start to the finish percentages. Enough
+    cycles are streamed for the moves to fill the requested duration.
+    """
+    templates, lengths, approach = _scale(compiled, lower, upper)
+
+    full_feed = compiled.feed * compiled.axis_cap * feed_adjust  # mm/min at 100%
+    cycle_minutes = (lengths / full_feed).sum()  # one cycle at 100% feed
+    approach_minutes = approach / full_feed[0]
+    if cycle_minutes <= 0:
+        raise ValueError(f"Pattern '{compiled.name}' does not move, cannot fill the duration")
+
+    def ramp(num_cycles, start, finish):
+        return start + (finish - start) * np.arange(num_cycles) / num_cycles
+
+    def runtime(num_cycles):
+        feed_percent = ramp(num_cycles, start_feed_percent, finish_feed_percent)
+        return (cycle_minutes * (100 / feed_percent)).sum() + approach_minutes * 100 / feed_percent[0]
+
+    # Fewest cycles whose ramped runtime covers the requested duration
+    low, high = 1, 1
+    while runtime(high) < duration_min:
+        low, high = high + 1, high * 2
+    while low < high:
+        middle = (low + high) // 2
+        if runtime(middle) < duration_min:
+            low = middle + 1
+        else:
+            high = middle
+    num_cycles = low
+
+    feed_percent = ramp(num_cycles, start_feed_percent, finish_feed_percent)
+    rpm_percent = ramp(num_cycles, start_rpm_percent, finish_rpm_percent)
+    feeds = np.outer(feed_percent / 100, full_feed)
+    feeds = np.maximum(np.rint(feeds), 1).astype(int)
+    rpms = np.rint(max_rpm * rpm_percent / 100).astype(int)
+
+    yield ""
+    yield f";-- Pattern Warmup: {compiled.name} ({num_cycles} cycles) --"
+    for cycle in range(num_cycles):
+        yield f"  M3 S{rpms[cycle]} ; Start/Adjust Spindle RPM"
+        yield from _fill(templates, feeds[cycle])
+    yield ""
+    yield "M5 ; Stop Spindle"
+
+
+def pattern_moves(machine_type: str, config: WarmupConfig, safe_z: float) -> List[str]:
+    """One cycle of the machine's registered pattern at the finish feed.
+
+    Scaled to the header limits like the streamed cycles, with the
+    pattern depth limited to safe_z below the top.
+    """
+    from .warmup_generator import get_plan
+
+    plan = get_plan(machine_type, config.tool)
+    compiled = compile_pattern(machine_type)
+    lower = (*plan.envelope_lower[:2], max(plan.envelope_lower[2], -abs(safe_z)))
+    templates, _, _ = _scale(compiled, lower, plan.envelope_upper)
+    feeds = compiled.feed * compiled.axis_cap * plan.feed_adjust * config.finish_feed_percent / 100
+    feeds = np.maximum(np.rint(feeds), 1).astype(int)
+    return [line.strip() for line in _fill(templates, feeds)]
@@ -0,0 +1,181 @@
+from dataclasses import dataclass
+from typing import Dict, Sequence
+
+import numpy as np
+
+from .models import MachineProfile, Tool
+from .patterns import APPROX_CYCLE_TIME
+from .warmup_generator import (
+    feedrate_adjustment, load_machine_profile, program_envelope, validate_tool_limits
+)
+
+MACHINE_TYPES = ("small", "medium", "large")
+
+# Default grid, roughly what we'd ever try on the floor
+DEFAULT_START_FEED = tuple(range(10, 55, 5))
+DEFAULT_FINISH_FEED = tuple(range(60, 110, 10))
+DEFAULT_START_RPM = tuple(range(10, 55, 5))
+DEFAULT_FINISH_RPM = tuple(range(60, 110, 10))
+DEFAULT_DURATION = tuple(range(10, 130, 10))
+
+PARAMETERS = ("start_feed_percent", "finish_feed_percent", "start_rpm_percent",
+              "finish_rpm_percent", "duration_min")
+METRICS = ("runtime_min", "travel_mm", "spindle_revs", "peak_feed")
+
+SWEEP_DTYPE = np.dtype([(name, "<i4") for name in PARAMETERS] +
+                       [(name, "<f8") for name in METRICS])
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    """Every evaluated grid point and the Pareto-optimal ones"""
+    machine_type: str
+    tool: Tool
+    points: np.ndarray  # SWEEP_DTYPE, one row per grid point
+    front: np.ndarray   # SWEEP_DTYPE, Pareto-optimal rows sorted by runtime
+
+
+def _program_geometry(machine: MachineProfile, tool: Tool):
+    """Corners, travel and feeds of the program the generator writes"""
+    # Header rounds the limits, the controller moves to the rounded values
+    lower, upper = (np.array(corner) for corner in program_envelope(machine, tool))
+    max_feed = np.array(machine.feedrate_mm_min, dtype=float) * feedrate_adjustment(machine, tool)
+
+    # Final single axis sweeps start from the bottom corner, one axis at a time
+    sweep_points = [lower]
+    for axis in range(3):
+        for corner in (lower, upper, lower):
+            point = np.zeros(3)
+            point[axis] = corner[axis]
+            sweep_points.append(point)
+    sweep_points = np.array(sweep_points)
+    sweep_moves = np.abs(np.diff(sweep_points, axis=0))
+    sweep_axis = np.repeat(np.arange(3), 3)
+    # minutes at 100% finish feed
+    sweep_time = (np.linalg.norm(sweep_moves, axis=1) / max_feed[sweep_axis]).sum()
+
+    return dict(
+        approach=np.linalg.norm(lower),  # tool starts at X0 Y0 Z0
+        approach_travel=np.abs(lower).sum(),
+        diagonal=np.linalg.norm(upper - lower),
+        diagonal_travel=np.abs(upper - lower).sum(),
+        sweep_time=sweep_time,
+        sweep_travel=sweep_moves.sum(),
+        max_feed=max_feed,
+        max_rpm=machine.max_rpm
+    )
+
+
+def _evaluate(geometry, start_feed, finish_feed, start_rpm, finish_rpm, duration):
+    """Metrics for flat arrays of grid points.
+
+    Feed only depends on the feed ramp and duration, so the per cycle sums run
+    once per unique (start feed, finish feed, duration) and get broadcast.
+    """
+    runtime = np.empty(len(start_feed))
+    travel = np.empty(len(start_feed))
+    revs = np.empty(len(start_feed))
+    peak = np.empty(len(start_feed))
+    max_feed_x = geometry["max_feed"][0]
+
+    for minutes in np.unique(duration):
+        num_cycles = max(1, round(minutes * 60 / APPROX_CYCLE_TIME))
+        progress = np.arange(num_cycles) / num_cycles
+        # Diagonal out and back every cycle, first cycle approaches from the origin
+        path = np.full(num_cycles, 2 * geometry["diagonal"])
+        path[0] += geometry["approach"]
+
+        in_group = duration == minutes
+        ramps, ramp_of = np.unique(
+            np.stack([start_feed[in_group], finish_feed[in_group]], axis=1),
+            axis=0, return_inverse=True)
+        ramp_of = ramp_of.reshape(-1)
+        feed_percent = ramps[:, :1] + (ramps[:, 1:] - ramps[:, :1]) * progress
+        cycle_time = path / (max_feed_x * feed_percent / 100)  # minutes
+        time_sum = cycle_time.sum(axis=1)
+        ramped_time_sum = (cycle_time * progress).sum(axis=1)
+        cycle_peak = max_feed_x * feed_percent.max(axis=1) / 100
+
+        group_start_rpm = start_rpm[in_group]
+        group_finish_rpm = finish_rpm[in_group]
+        group_finish_feed = finish_feed[in_group]
+        # RPM ramps linearly too, so revolutions split into two sums
+        revs[in_group] = geometry["max_rpm"] / 100 * (
+            group_start_rpm * time_sum[ramp_of]
+            + (group_finish_rpm - group_start_rpm) * ramped_time_sum[ramp_of])
+        runtime[in_group] = time_sum[ramp_of] + \
+            geometry["sweep_time"] * 100 / group_finish_feed
+        travel[in_group] = geometry["approach_travel"] + \
+            2 * num_cycles * geometry["diagonal_travel"] + geometry["sweep_travel"]
+        peak[in_group] = np.maximum(
+            cycle_peak[ramp_of], geometry["max_feed"].max() * group_finish_feed / 100)
+
+    return runtime, travel, revs, peak
+
+
+def pareto_mask(costs: np.ndarray) -> np.ndarray:
+    """Boolean mask of rows no other row beats in every column (lower is better)"""
+    # Visit rows by scaled cost sum: nothing later can dominate an earlier row,
+    # so every visited row is on the front and the loop runs once per front point
+    span = np.ptp(costs, axis=0)
+    score = (costs / np.where(span > 0, span, 1)).sum(axis=1)
+    candidates = np.argsort(score, kind="stable")
+    remaining = costs[candidates]
+    i = 0
+    while i < len(remaining):
+        keep = np.any(remaining < remaining[i], axis=1)
+        keep[i] = True
+        candidates = candidates[keep]
+        remaining = remaining[keep]
+        i = np.count_nonzero(keep[:i]) + 1
+    mask = np.zeros(len(costs), dtype=bool)
+    mask[candidates] = True
+    return mask
+
+
+def sweep(machine_type: str, tool: Tool,
+          start_feed_percent: Sequence[int] = DEFAULT_START_FEED,
+          finish_feed_percent: Sequence[int] = DEFAULT_FINISH_FEED,
+          start_rpm_percent: Sequence[int] = DEFAULT_START_RPM,
+          finish_rpm_percent: Sequence[int] = DEFAULT_FINISH_RPM,
+          duration_min: Sequence[int] = DEFAULT_DURATION) -> SweepResult:
+    """Evaluate every combination of warmup parameters for one machine.
+
+    Nothing is generated, the metrics come straight from the program
+    geometry. The Pareto front keeps the schedules that are shortest, gentlest
+    (lowest peak feed) and warm up the most (axis travel, spindle revolutions).
+    """
+    grid = [np.asarray(values, dtype=int) for values in (
+        start_feed_percent, finish_feed_percent, start_rpm_percent,
+        finish_rpm_percent, duration_min)]
+    for name, values in zip(PARAMETERS, grid):
+        if values.size == 0:
+            raise ValueError(f"No values to sweep for {name}")
+    if any((values <= 0).any() for values in grid[:4]):
+        raise ValueError("Feed and RPM percentages must be positive")
+    if (grid[4] <= 0).any() or (grid[4] > 120).any():
+        raise ValueError("Duration must be between 1-120 minutes")
+
+    machine = load_machine_profile(machine_type)
+    validate_tool_limits(machine, tool)
+    geometry = _program_geometry(machine, tool)
+
+    columns = [axis.ravel() for axis in np.meshgrid(*grid, indexing="ij")]
+    metrics = _evaluate(geometry, *columns)
+
+    points = np.zeros(len(columns[0]), dtype=SWEEP_DTYPE)
+    for name, values in zip(PARAMETERS + METRICS, (*columns, *metrics)):
+        points[name] = values
+
+    costs = np.stack([
+        points["runtime_min"], -points["travel_mm"],
+        -points["spindle_revs"], points["peak_feed"]
+    ], axis=1)
+    front = points[pareto_mask(costs)]
+    front = front[np.argsort(front["runtime_min"], kind="stable")]
+    return SweepResult(machine_type=machine_type, tool=tool, points=points, front=front)
+
+
+def sweep_all(tool: Tool, **grid) -> Dict[str, SweepResult]:
+    """Run the same sweep for every bundled machine profile"""
+    return {machine_type: sweep(machine_type, tool, **grid) for machine_type in MACHINE_TYPES}
@@ -1,9 +1,12 @@
 import math
-from typing import List
-from .models import WarmupConfig, MachineProfile
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from .models import WarmupConfig, MachineProfile, Tool, validate_warmup_settings
+from .patterns import compile_pattern, stream_cycles
 
 # Formatting constants
-GCODE_HEADER = """BEGIN PGM {machine_name} MM
+GCODE_HEADER_TOOL = """BEGIN PGM {machine_name} MM
 
 ;-- Clear Moves --
 L Z+0 RO FMAX ; Ensure Z is fully retracted
@@ -16,14 +19,18 @@ M5 ; Stop spindle
 TOOL DEF {tool_num} L+{tool_length} R{tool_radius}
 TOOL CALL {tool_num} Z S0
 
-;-- Warmup Parameter --
+"""
+
+GCODE_HEADER_PARAMETERS = """;-- Warmup Parameter --
 START_FEED_PERCENT = {start_feed_percent}
 FINISH_FEED_PERCENT = {finish_feed_percent}
 START_RPM_PERCENT = {start_rpm_percent}
 FINISH_RPM_PERCENT = {finish_rpm_percent}
 WARMUP_DURATION_MINUTES = {duration_min}
 
-;-- Machine Limit (using {safety_margin_program:.0f}% of travels to stay away from limits) --
+"""
+
+GCODE_HEADER_LIMITS = """;-- Machine Limit (using {safety_margin_program:.0f}% of travels to stay away from limits) --
 X_MAX = {x_max:.0f}
 X_MIN = {x_min:.0f}
 Y_MAX = {y_max:.0f}
@@ -102,92 +109,205 @@ M30 ; Reset spindle rotation
 END PGM {machine_name} MM"""
 
 
-class WarmupGenerator:
-    def __init__(self, config: WarmupConfig):
-        """Init with warmup configuration."""
-        self.config = config
-        self.machine = self._load_machine_profile()
-        self._validate_tool_limits()
-
-    def _load_machine_profile(self) -> MachineProfile:
-        """Dynamically load machine profile based on config"""
-        if self.config.machine_type == "small":
-            from .machines.small import PROFILE
-        elif self.config.machine_type == "medium":
-            from .machines.medium import PROFILE
+def load_machine_profile(machine_type: str) -> MachineProfile:
+    """Dynamically load machine profile for a machine type"""
+    if machine_type == "small":
+        from .machines.small import PROFILE
+    elif machine_type == "medium":
+        from .machines.medium import PROFILE
+    else:
+        from .machines.large import PROFILE
+    return PROFILE
+
+
+def validate_tool_limits(machine: MachineProfile, tool: Tool) -> None:
+    """Ensure tool can safely operate within machine limits"""
+    max_z_travel = abs(machine.z_limits[0])
+    safety_margin_validation = 0.90  # 10% safety margin
+    if tool.length > max_z_travel * safety_margin_validation:
+        raise ValueError(
+            f"Tool length {tool.length}mm exceeds "
+            f"90% of machine Z travel ({max_z_travel}mm)"
+        )
+
+
+def feedrate_adjustment(machine: MachineProfile, tool: Tool) -> float:
+    """Calculate feedrate reduction factor for long tools."""
+    normal_length = 100  # Standard tool length (mm), this assumed can be optimized.
+    max_recommended = abs(machine.z_limits[0]) * 0.95
+
+    if tool.length <= normal_length:
+        return 1.0  # No reduction, feed her the onions!
+
+    # Logarithmic reduction (more aggressive fro very long tools)
+    length_ratio = (tool.length - normal_length) / (max_recommended - normal_length)
+
+    return max(0.5, 1 - (0.5 * math.log10(1 + length_ratio * 9)))
+
+
+def program_limits(machine: MachineProfile, tool: Tool) -> Dict[str, float]:
+    """Travel limits written to the program header"""
+    adjusted_for_tool_length_z = abs(machine.z_limits[0]) - tool.length
+    safety_margin_program = 0.95  # use most of the travel to stay away from limits switches
+    return dict(
+        safety_margin_program=safety_margin_program*100,
+        x_max=machine.x_limits[1]*safety_margin_program,
+        x_min=machine.x_limits[0]*safety_margin_program,
+        y_max=machine.y_limits[1]*safety_margin_program,
+        y_min=machine.y_limits[0]*safety_margin_program,
+        z_min=adjusted_for_tool_length_z if adjusted_for_tool_length_z < 0 else 0,  # Ensure Z_MIN is negative or zero
+        z_max=machine.z_limits[1] if machine.z_limits[1] > 0 else 0  # Ensure z_max is positive or zero
+    )
+
+
+def program_envelope(machine: MachineProfile, tool: Tool) -> Tuple[Tuple[float, float, float],
+                                                                   Tuple[float, float, float]]:
+    """Lower and upper XYZ corners of the header limits, rounded like the header"""
+    limits = program_limits(machine, tool)
+    lower = (float(round(limits["x_min"])), float(round(limits["y_min"])),
+             float(-round(limits["z_min"])))
+    upper = (float(round(limits["x_max"])), float(round(limits["y_max"])),
+             float(round(limits["z_max"])))
+    return lower, upper
+
+
+# WarmupConfig fields (and their defaults) a plan renders, everything except machine and tool
+PLAN_SETTINGS = {
+    f.name: f.default for f in fields(WarmupConfig) if f.name not in ("machine_type", "tool")
+}
+
+
+@dataclass(frozen=True)
+class GenerationPlan:
+    """Everything about a program that only depends on the machine and tool.
+
+    Static header sections are rendered once, render() only fills in the
+    warmup parameters, coolant and movement sections. Plans are immutable,
+    so they can be shared between threads and pickled to worker processes.
+    """
+    machine_type: str
+    tool_number: int
+    tool_length: float
+    tool_radius: float
+    coolant_available: bool
+    max_rpm: int
+    feed_adjust: float
+    envelope_lower: Tuple[float, float, float]
+    envelope_upper: Tuple[float, float, float]
+    header_tool: Tuple[str, ...]    # pre-rendered GCODE_HEADER_TOOL lines
+    header_limits: Tuple[str, ...]  # pre-rendered GCODE_HEADER_LIMITS lines
+    footer: Tuple[str, ...]
+
+    @classmethod
+    def build(cls, machine_type: str, tool: Tool) -> "GenerationPlan":
+        """Resolve the profile, validate the tool and pre-render static sections"""
+        machine = load_machine_profile(machine_type)
+        validate_tool_limits(machine, tool)
+        feed_adjust = feedrate_adjustment(machine, tool)
+        machine_name = machine.name.replace(" ", "_")
+        lower, upper = program_envelope(machine, tool)
+
+        header_tool = GCODE_HEADER_TOOL.format(
+            machine_name=machine_name,
+            tool_num=tool.number,
+            tool_length=tool.length,
+            tool_radius=tool.radius,
+            feed_adjust=feed_adjust*100
+        )
+        header_limits = GCODE_HEADER_LIMITS.format(
+            **program_limits(machine, tool),
+            feed_adjust=feed_adjust*100,
+            x_max_feedrate=machine.feedrate_mm_min[0]*feed_adjust,
+            y_max_feedrate=machine.feedrate_mm_min[1]*feed_adjust,
+            z_max_feedrate=machine.feedrate_mm_min[2]*feed_adjust,
+            spindle_max_rpm=machine.max_rpm
+        )
+        footer = GCODE_FOOTER.format(machine_name=machine_name).split("\n")
+
+        return cls(
+            machine_type=machine_type,
+            tool_number=tool.number,
+            tool_length=tool.length,
+            tool_radius=tool.radius,
+            coolant_available=machine.coolant_available,
+            max_rpm=machine.max_rpm,
+            feed_adjust=feed_adjust,
+            envelope_lower=lower,
+            envelope_upper=upper,
+            # Tool and parameter sections end in a newline, the last split item
+            # is the start of the next section
+            header_tool=tuple(header_tool.split("\n")[:-1]),
+            header_limits=tuple(header_limits.split("\n")),
+            footer=tuple(footer)
+        )
+
+    def render(self, **settings) -> List[str]:
+        """Full program for the given WarmupConfig settings (duration, ramps, coolant...)"""
+        unknown = set(settings) - set(PLAN_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown warmup settings: {', '.join(sorted(unknown))}")
+        settings = {**PLAN_SETTINGS, **settings}
+        validate_warmup_settings(settings["duration_min"], settings["pattern_mode"])
+
+        # Only the warmup parameter block changes between renders
+        parameters = GCODE_HEADER_PARAMETERS.format(**settings).split("\n")[:-1]
+
+        # Format body - Time based XYZ and Spindle warmup
+        body = []
+        coolant = settings["use_coolant"] and self.coolant_available
+        if coolant:
+            body.append(GCODE_COOLANT_ON)
+
+        if settings["pattern_mode"] == "off":
+            body.append(GCODE_MOVEMENTS_TEMPLATE)
         else:
-            from .machines.large import PROFILE
-        return PROFILE
-
-    def _validate_tool_limits(self) -> None:
-        """Ensure tool can safely operate within machine limits"""
-        max_z_travel = abs(self.machine.z_limits[0])
-        safety_margin_validation = 0.90  # 10% safety margin
-        if self.config.tool.length > max_z_travel * safety_margin_validation:
-            raise ValueError(
-                f"Tool length {self.config.tool.length}mm exceeds "
-                f"90% of machine Z travel ({max_z_travel}mm)"
+            # Machine pattern streamed as explicit cycles instead of the FOR loop
+            compiled = compile_pattern(
+                self.machine_type,
+                alongside=settings["pattern_mode"] == "alongside"
             )
+            body.extend(stream_cycles(
+                compiled, self.envelope_lower, self.envelope_upper,
+                self.feed_adjust, self.max_rpm,
+                duration_min=settings["duration_min"],
+                start_feed_percent=settings["start_feed_percent"],
+                finish_feed_percent=settings["finish_feed_percent"],
+                start_rpm_percent=settings["start_rpm_percent"],
+                finish_rpm_percent=settings["finish_rpm_percent"]
+            ))
+
+        if coolant:
+            body.append(GCODE_COOLANT_OFF)
 
-    def _calculate_feedrate_adjustment(self) -> float:
-        """Calculate feedrate reduction factor for long tools."""
-        normal_length = 100  # Standard tool length (mm), this assumed can be optimized.
-        max_recommended = abs(self.machine.z_limits[0]) * 0.95
+        body.append(GCODE_FINAL_MOVEMENTS_TEMPLATE)
 
-        if self.config.tool.length <= normal_length:
-            return 1.0  # No reduction, feed her the onions!
+        return [*self.header_tool, *parameters, *self.header_limits, *body, *self.footer]
 
-        # Logarithmic reduction (more aggressive fro very long tools)
-        length_ratio = (self.config.tool.length - normal_length) / (max_recommended - normal_length)
 
-        return max(0.5, 1 - (0.5 * math.log10(1 + length_ratio * 9)))
+@lru_cache(maxsize=256, typed=True)  # L+100 and L+100.0 render differently
+def _cached_plan(machine_type: str, number: int, length: float, radius: float) -> GenerationPlan:
+    return GenerationPlan.build(machine_type, Tool(number=number, length=length, radius=radius))
 
-    def generate_gcode(self) -> List[str]:
-        """Generates complete warmup routine with tool compensation"""
-        adjusted_for_tool_length_z = abs(self.machine.z_limits[0]) - self.config.tool.length
-        safety_margin_program = 0.95  # use most of the travel to stay away from limits switches
-        feed_adjust = self._calculate_feedrate_adjustment()
-
-        # Format header
-        header = GCODE_HEADER.format(
-            machine_name=self.machine.name.replace(" ", "_"),
-            tool_num=self.config.tool.number,
-            tool_length=self.config.tool.length,
-            tool_radius=self.config.tool.radius,
-            feed_adjust=feed_adjust*100,
-            start_feed_percent=self.config.start_feed_percent,
-            finish_feed_percent=self.config.finish_feed_percent,
-            start_rpm_percent=self.config.start_rpm_percent,
-            finish_rpm_percent=self.config.finish_rpm_percent,
-            duration_min=self.config.duration_min,
-            safety_margin_program=safety_margin_program*100,
-            x_max=self.machine.x_limits[1]*safety_margin_program,
-            x_min=self.machine.x_limits[0]*safety_margin_program,
-            y_max=self.machine.y_limits[1]*safety_margin_program,
-            y_min=self.machine.y_limits[0]*safety_margin_program,
-            z_min=adjusted_for_tool_length_z if adjusted_for_tool_length_z < 0 else 0,  # Ensure Z_MIN is negative or zero
-            z_max=self.machine.z_limits[1] if self.machine.z_limits[1] > 0 else 0,  # Ensure z_max is positive or zero
-            x_max_feedrate=self.machine.feedrate_mm_min[0]*feed_adjust,
-            y_max_feedrate=self.machine.feedrate_mm_min[1]*feed_adjust,
-            z_max_feedrate=self.machine.feedrate_mm_min[2]*feed_adjust,
-            spindle_max_rpm=self.machine.max_rpm
-        ).split("\n")
 
-        # Format body - Time based XYZ and Spindle warmup
-        body = []
-        if self.config.use_coolant and self.machine.coolant_available:
-            body.append(GCODE_COOLANT_ON)
-
-        body.append(GCODE_MOVEMENTS_TEMPLATE)
+def get_plan(machine_type: str, tool: Tool) -> GenerationPlan:
+    """Shared plan for a machine and tool, built on first use"""
+    return _cached_plan(machine_type, tool.number, tool.length, tool.radius)
 
-        if self.config.use_coolant and self.machine.coolant_available:
-            body.append(GCODE_COOLANT_OFF)
 
-        body.append(GCODE_FINAL_MOVEMENTS_TEMPLATE)
+class WarmupGenerator:
+    def __init__(self, config: WarmupConfig):
+        """Init with warmup configuration."""
+        self.config = config
+        # Validates the tool once per machine/tool pair
+        self.plan = get_plan(config.machine_type, config.tool)
 
-        # Format footer
-        footer = GCODE_FOOTER.format(
-            machine_name=self.machine.name.replace(" ", "_")
-        ).split("\n")
+    @property
+    def machine(self) -> MachineProfile:
+        """Machine profile, only looked up when asked for"""
+        return load_machine_profile(self.config.machine_type)
 
-        return [line for line in (*header, *body, *footer)]
+    def generate_gcode(self) -> List[str]:
+        """Generates complete warmup routine with tool compensation"""
+        return self.plan.render(
+            **{name: getattr(self.config, name) for name in PLAN_SETTINGS}
+        )
@@ -0,0 +1,130 @@
+import zlib
+
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from src.cnc_warmup.archive import ProgramArchive, config_hash
+from src.cnc_warmup.models import WarmupConfig, Tool
+from src.cnc_warmup.warmup_generator import WarmupGenerator
+
+
+@pytest.fixture
+def configs():
+    return [
+        WarmupConfig(machine_type=machine, tool=Tool(number=1, length=100), duration_min=duration)
+        for machine in ("small", "medium")
+        for duration in (10, 20)
+    ]
+
+
+def test_append_and_read(tmp_path, configs):
+    """Programs come back exactly as generated"""
+    archive = ProgramArchive(tmp_path / "archive")
+    programs = {}
+    for i, config in enumerate(configs):
+        gcode = WarmupGenerator(config).generate_gcode()
+        archive.append(config, gcode, timestamp=1000 + i)
+        programs[config_hash(config)] = "\n".join(gcode)
+
+    assert len(archive) == 4
+    for config in configs:
+        entry = archive.latest(config)
+        assert archive.read(entry) == programs[config_hash(config)]
+
+
+def test_find_filters(tmp_path, configs):
+    archive = ProgramArchive(tmp_path)
+    for i, config in enumerate(configs):
+        archive.append(config, WarmupGenerator(config).generate_gcode(), timestamp=1000 + i)
+
+    assert [e.machine for e in archive.find(machine="medium")] == ["medium", "medium"]
+    assert [e.timestamp for e in archive.find(since=1001, until=1002)] == [1001, 1002]
+    assert archive.find(config_hash="0" * 16) == []
+
+    # Reopening picks up the existing index
+    assert len(ProgramArchive(tmp_path)) == 4
+
+
+def test_segments_roll_over_and_compact(tmp_path, configs):
+    """Small segments roll over, compaction packs them and drops duplicates"""
+    archive = ProgramArchive(tmp_path, segment_size=1)
+    for i in range(3):
+        for config in configs:
+            archive.append(config, WarmupGenerator(config).generate_gcode(), timestamp=i)
+    assert len(list(tmp_path.glob("*.seg"))) == 12
+
+    before = {e: archive.read(e) for e in archive.find()}
+    # 11 sealed segments hold 4 distinct programs, one pack each
+    assert archive.compact() == 7
+    assert [p.name for p in tmp_path.glob("*.seg")] == ["00011.seg"]
+    assert sorted(p.name for p in tmp_path.glob("*.pack")) == [
+        "00000.pack", "00001.pack", "00002.pack", "00003.pack"]
+    assert len(archive) == 12
+    for old, new in zip(before, archive.find()):
+        assert archive.read(new) == before[old]
+
+    # Packs are final, later compactions only take new sealed segments
+    packs = {p.name: p.stat().st_mtime_ns for p in tmp_path.glob("*.pack")}
+    assert archive.compact() == 0
+    archive.append(configs[0], WarmupGenerator(configs[0]).generate_gcode(), timestamp=3)
+    archive.append(configs[1], WarmupGenerator(configs[1]).generate_gcode(), timestamp=3)
+    assert archive.compact() == 2  # both programs are already in a pack
+    assert {p.name: p.stat().st_mtime_ns for p in tmp_path.glob("*.pack")} == packs
+    assert [p.name for p in tmp_path.glob("*.seg")] == ["00013.seg"]
+    for old, new in zip(before, archive.find()):
+        assert archive.read(new) == before[old]
+    assert archive.read(archive.find()[-1]) == before[list(before)[1]]
+
+
+def test_compact_keeps_crc_collisions(tmp_path, configs, monkeypatch):
+    """Programs with the same crc and length but different text stay separate"""
+    archive = ProgramArchive(tmp_path, segment_size=1)
+    monkeypatch.setattr(zlib, "crc32", lambda data: 0)
+    for gcode in (["L X+1"], ["L X+2"], ["L X+3"]):
+        archive.append(configs[0], gcode)
+
+    archive.compact()
+    assert [archive.read(e) for e in archive.find()] == ["L X+1", "L X+2", "L X+3"]
+
+
+def _append_many(path, worker, count):
+    archive = ProgramArchive(path, segment_size=64 * 1024)
+    for i in range(count):
+        config = WarmupConfig(machine_type="small", tool=Tool(number=worker + 1, length=100),
+                              duration_min=i % 120 + 1)
+        archive.append(config, WarmupGenerator(config).generate_gcode())
+
+
+def test_concurrent_appends(tmp_path):
+    """Appends from several processes all stay readable"""
+    with ProcessPoolExecutor(max_workers=8) as pool:
+        for future in [pool.submit(_append_many, tmp_path, worker, 50) for worker in range(8)]:
+            future.result()
+
+    archive = ProgramArchive(tmp_path)
+    entries = archive.find()
+    assert len(entries) == 400
+    assert len(list(tmp_path.glob("*.seg"))) > 1
+    for entry in entries:
+        assert archive.read(entry).startswith("BEGIN PGM")
+
+
+def test_torn_index_record(tmp_path, configs):
+    """A partly written record is dropped, later appends stay aligned"""
+    archive = ProgramArchive(tmp_path)
+    gcode = WarmupGenerator(configs[0]).generate_gcode()
+    archive.append(configs[0], gcode)
+    with open(tmp_path / "index.idx", "ab") as f:
+        f.write(b"torn")
+    assert len(archive) == 1
+
+    archive.append(configs[1], WarmupGenerator(configs[1]).generate_gcode())
+    entries = archive.find()
+    assert [e.machine for e in entries] == ["small", "small"]
+    assert archive.read(entries[0]) == "\n".join(gcode)
+    assert archive.read(entries[1]).startswith("BEGIN PGM")
+
+
+def test_not_an_archive(tmp_path):
+    (tmp_path / "index.idx").write_bytes(b"nope")
+    with pytest.raises(ValueError, match="not a warmup archive"):
+        ProgramArchive(tmp_path)
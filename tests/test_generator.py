@@ -1,7 +1,9 @@
+import pickle
 import pytest
+from dataclasses import FrozenInstanceError
 from pathlib import Path
 from src.cnc_warmup.models import WarmupConfig, Tool
-from src.cnc_warmup.warmup_generator import WarmupGenerator
+from src.cnc_warmup.warmup_generator import GenerationPlan, WarmupGenerator, get_plan
 
 
 class TestWarmupGenerator:
@@ -81,3 +83,41 @@ class TestWarmupGenerator:
         generator = WarmupGenerator(config)
         assert generator is not None
         assert f"{machine.capitalize()}_CNC_Machine" in generator.generate_gcode()[0]
+
+
+class TestGenerationPlan:
+    def test_render_matches_generator(self):
+        """Re-rendering a plan gives the same program as a fresh generator"""
+        plan = get_plan("small", Tool(number=2, length=150.0))
+        for duration, coolant, mode in [(10, False, "off"), (45, True, "replace")]:
+            config = WarmupConfig(
+                machine_type="small",
+                tool=Tool(number=2, length=150.0),
+                duration_min=duration,
+                start_feed_percent=40,
+                use_coolant=coolant,
+                pattern_mode=mode
+            )
+            assert plan.render(
+                duration_min=duration, start_feed_percent=40, use_coolant=coolant, pattern_mode=mode
+            ) == WarmupGenerator(config).generate_gcode()
+
+
+    def test_plan_shared_hashable_and_picklable(self):
+        plan = get_plan("large", Tool(number=3, length=120.0))
+        assert get_plan("large", Tool(number=3, length=120.0)) is plan
+        assert hash(plan) == hash(GenerationPlan.build("large", Tool(number=3, length=120.0)))
+        assert pickle.loads(pickle.dumps(plan)) == plan
+        with pytest.raises(FrozenInstanceError):
+            plan.feed_adjust = 1.0
+
+
+    def test_plan_validation(self):
+        with pytest.raises(ValueError, match="exceeds 90% of machine Z travel"):
+            get_plan("medium", Tool(number=1, length=550))
+
+        plan = get_plan("medium", Tool(number=1, length=100.0))
+        with pytest.raises(ValueError, match="Unknown warmup settings: tool"):
+            plan.render(tool=Tool(number=2, length=100))
+        with pytest.raises(ValueError, match="Duration cannot exceed"):
+            plan.render(duration_min=200)
@@ -19,6 +19,8 @@ def test_small_custom_movements():
     )
     moves = custom_movements(config, safe_z=400)
 
-    assert len(moves) == 5 # should be 4 linear and 1 circular
-    assert any("X+300" in line for line in moves)
-    assert any("CIRCLE" in line for line in moves)
+    assert len(moves) == 7 # should be 4 linear and 1 circular (approach, center, arc)
+    assert any("X+300.5" in line for line in moves)
+    assert any(line.startswith("C X") and "DR-" in line for line in moves)
+    # Header limits are Z_MAX = 0 and Z_MIN = -0 for this tool
+    assert all(float(line.split("Z")[1].split()[0]) == 0 for line in moves if "Z" in line)
@@ -0,0 +1,172 @@
+import math
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+from src.cnc_warmup.models import WarmupConfig, Tool
+from src.cnc_warmup import patterns
+from src.cnc_warmup.patterns import (
+    Pattern, Line, Circle, compile_pattern, get_pattern, register_pattern, stream_cycles
+)
+from src.cnc_warmup.warmup_generator import WarmupGenerator
+
+# Not a bundled machine, profile lookup falls back to the large machine
+TEST_MACHINE = "test_machine"
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Registry copy for the test, restored with the compile cache afterwards"""
+    # Load bundled patterns first, a module imported during the test would
+    # only register into the copy
+    for machine in ("small", "medium", "large"):
+        get_pattern(machine)
+    monkeypatch.setattr(patterns, "_REGISTRY", dict(patterns._REGISTRY))
+    compile_pattern.cache_clear()
+    yield patterns._REGISTRY
+    compile_pattern.cache_clear()
+
+
+def test_pattern_validation():
+    """Patterns must stay inside the normalized envelope"""
+    with pytest.raises(ValueError, match="no segments"):
+        Pattern(name="empty", segments=())
+    with pytest.raises(ValueError, match="envelope"):
+        Pattern(name="wide", segments=(Line(1.5, 0, 0),))
+    with pytest.raises(ValueError, match="feed"):
+        Pattern(name="fast", segments=(Line(0, 0, 0, feed=2),))
+
+
+def test_machine_patterns_registered():
+    """Each bundled machine declares a pattern"""
+    for machine in ("small", "medium", "large"):
+        assert get_pattern(machine).name == machine
+
+
+def test_registered_pattern_survives_machine_import():
+    """A pattern registered before the machine module loads is not overwritten"""
+    # Fresh interpreter, the bundled machine modules must not be imported yet
+    script = textwrap.dedent("""
+        from src.cnc_warmup.models import Tool, WarmupConfig
+        from src.cnc_warmup.patterns import Line, Pattern, get_pattern, register_pattern
+        from src.cnc_warmup.warmup_generator import WarmupGenerator
+
+        register_pattern("small", Pattern(name="mine", segments=(Line(0.5, 0, 0.5), Line(-0.5, 0, 0.5))))
+        config = WarmupConfig(machine_type="small", tool=Tool(number=1, length=100, radius=5),
+                              pattern_mode="replace")
+        lines = WarmupGenerator(config).generate_gcode()
+        print(any(line.startswith(";-- Pattern Warmup: mine ") for line in lines))
+        print(get_pattern("small").name)
+    """)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                            cwd=Path(__file__).resolve().parents[1], check=True)
+    assert result.stdout.split() == ["True", "mine"]
+
+
+def test_compile_pattern_cached(registry):
+    """Compiled once per profile until the pattern is re-registered"""
+    pattern = register_pattern(TEST_MACHINE, Pattern(name="test", segments=(Line(1, 0, 0),)))
+    compiled = compile_pattern(TEST_MACHINE)
+    assert compile_pattern(TEST_MACHINE) is compiled
+    assert len(compile_pattern(TEST_MACHINE, alongside=True).kinds) == len(compiled.kinds) + 3
+
+    register_pattern(TEST_MACHINE, pattern)
+    assert compile_pattern(TEST_MACHINE) is not compiled
+    assert register_pattern(TEST_MACHINE, get_pattern("small"), replace=False) is pattern
+
+
+def test_stream_cycles_clamped_and_ramped(registry):
+    """Geometry stays in the envelope and feeds ramp up every cycle"""
+    config = WarmupConfig(
+        machine_type="small",
+        tool=Tool(number=1, length=100),
+        duration_min=1
+    )
+    register_pattern(TEST_MACHINE, Pattern(name="test", segments=(
+        Line(1, -1, 1),
+        Circle(1, 0, 1, z=0),  # would leave the envelope without clamping
+    )))
+    compiled = compile_pattern(TEST_MACHINE)
+
+    lines = list(stream_cycles(
+        compiled, (-100, -50, -200), (100, 50, 0), 1.0, 16000,
+        duration_min=config.duration_min,
+        start_feed_percent=config.start_feed_percent,
+        finish_feed_percent=config.finish_feed_percent,
+        start_rpm_percent=config.start_rpm_percent,
+        finish_rpm_percent=config.finish_rpm_percent
+    ))
+
+    assert 1 <= program_minutes(lines) * 1.001  # cycles fill the 1 minute
+    assert "  L X+100.0 Y-50.0 Z-200.0 F10000" in lines  # 25% of Z 40 m/min
+    assert "  CC X+50.0 Y+0.0" in lines
+    assert "  L X+100.0 Y-50.0 Z-200.0 F40000" not in lines  # last cycle is below finish
+    feeds = [int(line.rsplit("F", 1)[1]) for line in lines if line.startswith("  L X+100.0")]
+    assert feeds == sorted(feeds)
+
+
+def test_generator_pattern_modes():
+    """Pattern replaces or follows the diagonal cycle"""
+    config = WarmupConfig(
+        machine_type="small",
+        tool=Tool(number=1, length=100),
+        duration_min=1,
+        pattern_mode="replace"
+    )
+    gcode = WarmupGenerator(config).generate_gcode()
+    assert "FOR CYCLE = 1 TO NUM_CYCLES" not in "\n".join(gcode)
+    assert any(line.startswith(";-- Pattern Warmup: small") for line in gcode)
+    assert any(line.startswith("  C X") for line in gcode)
+
+    config.pattern_mode = "alongside"
+    gcode = WarmupGenerator(config).generate_gcode()
+    assert any(line.startswith(";-- Pattern Warmup: diagonal+small") for line in gcode)
+
+    with pytest.raises(ValueError, match="Pattern mode"):
+        WarmupConfig(machine_type="small", tool=Tool(number=1, length=100), pattern_mode="spiral")
+
+
+def program_minutes(lines):
+    """Time the streamed moves take, walking them one by one from X0 Y0 Z0"""
+    position = (0.0, 0.0, 0.0)
+    center = None
+    minutes = 0
+    for line in lines:
+        words = {word[0]: word[1:] for word in line.split()[1:] if word[0] in "XYZF"}
+        if line.startswith("  L "):
+            target = tuple(float(words[axis]) for axis in "XYZ")
+            minutes += math.dist(position, target) / int(words["F"])
+            position = target
+        elif line.startswith("  CC "):
+            center = (float(words["X"]), float(words["Y"]))
+        elif line.startswith("  C "):
+            end = (float(words["X"]), float(words["Y"]))
+            start_angle = math.atan2(position[1] - center[1], position[0] - center[0])
+            end_angle = math.atan2(end[1] - center[1], end[0] - center[0])
+            sweep = (start_angle - end_angle if "DR-" in line else end_angle - start_angle) % (2 * math.pi)
+            radius = math.dist(position[:2], center)
+            minutes += radius * (sweep or 2 * math.pi) / int(words["F"])
+            position = (*end, position[2])
+    return minutes
+
+
+@pytest.mark.parametrize("machine", ["small", "medium", "large"])
+@pytest.mark.parametrize("mode", ["replace", "alongside"])
+def test_stream_cycles_fill_duration(machine, mode):
+    """Streamed cycles take the requested duration, not the FOR loop estimate"""
+    config = WarmupConfig(
+        machine_type=machine,
+        tool=Tool(number=1, length=150),
+        duration_min=30,
+        pattern_mode=mode
+    )
+    gcode = WarmupGenerator(config).generate_gcode()
+    start = gcode.index(next(line for line in gcode if line.startswith(";-- Pattern Warmup")))
+    cycles = gcode[start:gcode.index("M5 ; Stop Spindle", start)]
+    moves = program_minutes(cycles)
+
+    # One more cycle is at most a couple of minutes, F is rounded to whole mm/min
+    assert 30 <= moves * 1.001
+    assert moves < 32
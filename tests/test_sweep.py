@@ -0,0 +1,87 @@
+import csv
+import math
+import sys
+import numpy as np
+import pytest
+from src.cnc_warmup.cli import sweep_main
+from src.cnc_warmup.machines.medium import PROFILE
+from src.cnc_warmup.models import Tool
+from src.cnc_warmup.sweep import pareto_mask, sweep, sweep_all
+from src.cnc_warmup.warmup_generator import feedrate_adjustment
+
+
+def simulate(tool, start_feed, finish_feed, start_rpm, finish_rpm, duration):
+    """Step through the FOR loop one cycle at a time"""
+    lower = (-483, -314, 0)  # medium limits at 95%, rounded like the header
+    upper = (483, 314, 0)
+    max_feed_x = PROFILE.feedrate_mm_min[0] * feedrate_adjustment(PROFILE, tool)
+    diagonal = math.dist(lower, upper)
+    num_cycles = max(1, round(duration * 60 / 10))
+    runtime = revs = 0
+    for cycle in range(num_cycles):
+        feed = max_feed_x * (start_feed + (finish_feed - start_feed) * cycle / num_cycles) / 100
+        rpm = PROFILE.max_rpm * (start_rpm + (finish_rpm - start_rpm) * cycle / num_cycles) / 100
+        path = 2 * diagonal + (math.dist((0, 0, 0), lower) if cycle == 0 else 0)
+        runtime += path / feed
+        revs += rpm * path / feed
+    return runtime, revs
+
+
+def test_sweep_matches_simulation():
+    """Vectorized metrics agree with a cycle by cycle walk"""
+    tool = Tool(number=1, length=150)
+    result = sweep("medium", tool, start_feed_percent=[20, 30], finish_feed_percent=[90],
+                   start_rpm_percent=[25], finish_rpm_percent=[80, 100],
+                   duration_min=[5, 30])
+    assert len(result.points) == 8
+
+    for point in result.points:
+        runtime, revs = simulate(tool, *(int(point[i]) for i in range(5)))
+        # Single axis sweeps at 90% finish feed, Z_MIN is 0 so Z only travels back up
+        feed_x, feed_y, feed_z = (f * feedrate_adjustment(PROFILE, tool) * 0.9
+                                  for f in PROFILE.feedrate_mm_min)
+        sweeps = (314 + 4 * 483) / feed_x + (math.hypot(483, 314) + 4 * 314) / feed_y \
+            + 314 / feed_z
+        assert point["runtime_min"] == pytest.approx(runtime + sweeps)
+        assert point["spindle_revs"] == pytest.approx(revs)
+
+
+def test_pareto_front():
+    """Front only holds points nothing else beats on every metric"""
+    result = sweep("small", Tool(number=1, length=100), duration_min=[10, 60])
+    assert 0 < len(result.front) < len(result.points)
+    assert list(result.front["runtime_min"]) == sorted(result.front["runtime_min"])
+
+    costs = np.array([[1, 1], [2, 2], [0, 3], [1, 1], [3, 0]], dtype=float)
+    assert list(pareto_mask(costs)) == [True, False, True, False, True]
+
+
+def test_sweep_all_and_validation():
+    results = sweep_all(Tool(number=1, length=100), duration_min=[30])
+    assert set(results) == {"small", "medium", "large"}
+
+    with pytest.raises(ValueError, match="must be positive"):
+        sweep("small", Tool(number=1, length=100), start_feed_percent=[0])
+    with pytest.raises(ValueError, match="Duration"):
+        sweep("small", Tool(number=1, length=100), duration_min=[150])
+    with pytest.raises(ValueError, match="exceeds 90%"):
+        sweep("small", Tool(number=1, length=460))
+
+
+def test_sweep_cli_csv(tmp_path, monkeypatch):
+    """CSV export keeps integer parameters and full precision metrics"""
+    output = tmp_path / "front.csv"
+    monkeypatch.setattr(sys, "argv", [
+        "cnc-warmup-sweep", "small", "--tool-length", "150", "--duration", "60", "-o", str(output)
+    ])
+    sweep_main()
+
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    front = sweep("small", Tool(number=1, length=150), duration_min=[60]).front
+    assert len(rows) == len(front)
+    for row, point in zip(rows, front):
+        assert row["duration_min"] == "60"
+        assert int(row["start_feed_percent"]) == point["start_feed_percent"]
+        for metric in ("runtime_min", "travel_mm", "spindle_revs", "peak_feed"):
+            assert float(row[metric]) == point[metric]